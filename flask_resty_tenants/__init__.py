@@ -1,5 +1,6 @@
 # flake8: noqa
 
+from .async_authorization import AsyncTenantAuthorization
 from .authorization import (
     ADMIN,
     MEMBER,
@@ -7,4 +8,5 @@ from .authorization import (
     PUBLIC,
     READ_ONLY,
     TenantAuthorization,
+    TenantAuthorizationPolicy,
 )
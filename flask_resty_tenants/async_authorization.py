@@ -0,0 +1,150 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+import flask
+
+from .authorization import TenantAuthorization
+
+# -----------------------------------------------------------------------------
+
+
+class RoleLookupAbandoned(Exception):
+    """The request running a shared role lookup was cancelled."""
+
+
+# -----------------------------------------------------------------------------
+
+
+class AsyncTenantAuthorization(TenantAuthorization):
+    """Tenant authorization backed by an asynchronous role source.
+
+    `role_source` must provide a coroutine `get_role_data(credentials)` that
+    returns the tenant role mapping for the given credentials. The mapping
+    is resolved when the request is authorized, then used for the rest of the
+    request by all of the synchronous checks. Checking roles before they are
+    resolved is an error.
+
+    Concurrent lookups for the same credential are coalesced, including
+    across requests running on different event loops.
+    """
+
+    role_source = None
+    role_source_key_field = "sub"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._pending_lookups = {}
+        self._pending_lookups_lock = threading.Lock()
+
+    def get_role_data(self):
+        try:
+            return flask.g._tenant_role_data[self]
+        except (AttributeError, KeyError):
+            raise RuntimeError(
+                "role data must be resolved with resolve_role_data first"
+            )
+
+    def is_role_data_resolved(self):
+        return self in flask.g.get("_tenant_role_data", {})
+
+    def get_role_source_key(self, credentials):
+        try:
+            return credentials[self.role_source_key_field]
+        except (TypeError, KeyError):
+            return None
+
+    async def resolve_role_data(self):
+        if self.is_role_data_resolved():
+            return self.get_role_data()
+
+        role_data = await self.load_role_data()
+        if not isinstance(role_data, dict):
+            role_data = {}
+
+        flask.g.setdefault("_tenant_role_data", {})[self] = role_data
+        return role_data
+
+    async def load_role_data(self):
+        credentials = self.get_request_credentials()
+        if credentials is None:
+            return {}
+
+        key = self.get_role_source_key(credentials)
+        if key is None:
+            return await self.role_source.get_role_data(credentials)
+
+        while True:
+            # Requests may run on different event loops, so share a
+            # thread-safe future rather than an asyncio one.
+            with self._pending_lookups_lock:
+                lookup = self._pending_lookups.get(key)
+                if lookup is not None:
+                    pending = True
+                else:
+                    pending = False
+                    lookup = self._pending_lookups[key] = Future()
+
+            if not pending:
+                break
+
+            try:
+                # Don't let one cancelled waiter cancel the shared lookup.
+                return await asyncio.shield(asyncio.wrap_future(lookup))
+            except RoleLookupAbandoned:
+                continue
+
+        try:
+            role_data = await self.role_source.get_role_data(credentials)
+        except asyncio.CancelledError:
+            # Only this request was cancelled, so let a waiter take over the
+            # lookup instead of cancelling every waiter.
+            self.finish_lookup(key, lookup, exception=RoleLookupAbandoned())
+            raise
+        except BaseException as e:
+            self.finish_lookup(key, lookup, exception=e)
+            raise
+
+        self.finish_lookup(key, lookup, result=role_data)
+        return role_data
+
+    def finish_lookup(self, key, lookup, result=None, exception=None):
+        # Remove the lookup first, so waiters that retry don't find it.
+        with self._pending_lookups_lock:
+            del self._pending_lookups[key]
+
+        if exception is not None:
+            lookup.set_exception(exception)
+        else:
+            lookup.set_result(result)
+
+    async def get_tenant_role_async(self, tenant_id):
+        await self.resolve_role_data()
+        return self.get_tenant_role(tenant_id)
+
+    def authorize_request(self):
+        if not self.is_role_data_resolved():
+            # Flask-RESTy authorizes the request synchronously before the view
+            # runs, so resolve the role data here the same way Flask runs
+            # async views. This keeps the tenant check from being skipped.
+            app = flask.current_app
+            if not hasattr(app, "ensure_sync"):
+                raise RuntimeError("resolving role data requires Flask 2")
+
+            app.ensure_sync(self.resolve_role_data)()
+
+        super().authorize_request()
+
+    async def authorize_request_async(self):
+        await self.resolve_role_data()
+        self.authorize_request()
+
+    async def authorize_modify_item_async(self, item, action):
+        await self.resolve_role_data()
+        self.authorize_modify_item(item, action)
+
+    async def authorize_modify_items_async(self, items, action):
+        await self.resolve_role_data()
+        for item in items:
+            self.authorize_modify_item(item, action)
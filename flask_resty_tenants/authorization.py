@@ -1,13 +1,20 @@
+from collections import namedtuple
+from operator import itemgetter
+from types import MappingProxyType
 from uuid import UUID
 
 import flask
+import sqlalchemy as sa
 from flask_resty import (
     ApiError,
     AuthorizeModifyMixin,
     HasCredentialsAuthorizationBase,
+    context,
 )
 from flask_resty.utils import settable_property
 
+from .patterns import TenantPatternTrie
+
 # -----------------------------------------------------------------------------
 
 PUBLIC = float("-inf")
@@ -16,6 +23,49 @@ MEMBER = 1
 ADMIN = 2
 NOT_ALLOWED = float("inf")
 
+READ_ACTION = "read"
+MODIFY_ACTIONS = ("save", "create", "update", "delete")
+
+# -----------------------------------------------------------------------------
+
+
+class TenantAuthorizationPolicy(
+    namedtuple(
+        "TenantAuthorizationPolicy",
+        ("roles", "read_public", "modify_not_allowed"),
+    )
+):
+    """The static role configuration of a `TenantAuthorization`.
+
+    `roles` maps each action to its required role. `read_public` and
+    `modify_not_allowed` allow skipping the tenant role lookup entirely.
+    The policy is recompiled whenever a role is set on the authorization.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_roles(cls, roles):
+        modify_roles = tuple(roles[action] for action in MODIFY_ACTIONS)
+        return cls(
+            roles=MappingProxyType(dict(roles)),
+            read_public=roles[READ_ACTION] == PUBLIC,
+            modify_not_allowed=all(
+                role == NOT_ALLOWED for role in modify_roles
+            ),
+        )
+
+    def get_required_role(self, action):
+        return self.roles[action]
+
+    def as_dict(self):
+        return {
+            "roles": dict(self.roles),
+            "read_public": self.read_public,
+            "modify_not_allowed": self.modify_not_allowed,
+        }
+
+
 # -----------------------------------------------------------------------------
 
 
@@ -28,9 +78,13 @@ class TenantAuthorization(
     role_field = "app_metadata"
 
     global_tenant = "*"
+    tenant_pattern_suffix = "*"
     tenant_id_type = UUID
     tenant_id_field = "tenant_id"
 
+    stream_chunk_size = 500
+    stream_yield_per = 1000
+
     @settable_property
     def save_role(self):
         return self.modify_role
@@ -47,6 +101,36 @@ class TenantAuthorization(
     def delete_role(self):
         return self.modify_role
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name.endswith("_role"):
+            self.clear_policy()
+
+    def __delattr__(self, name):
+        super().__delattr__(name)
+        if name.endswith("_role"):
+            self.clear_policy()
+
+    def get_policy(self):
+        # Compile the role configuration once per instance. Setting a role on
+        # the instance clears the compiled policy.
+        try:
+            return self._policy
+        except AttributeError:
+            self._policy = self.compile_policy()
+            return self._policy
+
+    def clear_policy(self):
+        self.__dict__.pop("_policy", None)
+
+    def compile_policy(self):
+        return TenantAuthorizationPolicy.from_roles(
+            {
+                action: getattr(self, f"{action}_role")
+                for action in (READ_ACTION,) + MODIFY_ACTIONS
+            }
+        )
+
     def get_request_tenant_id(self):
         return flask.request.view_args[self.tenant_id_field]
 
@@ -79,18 +163,55 @@ class TenantAuthorization(
         role = self.get_role_data().get(self.global_tenant, PUBLIC)
         return self.ensure_role(role)
 
+    def is_tenant_pattern(self, key):
+        return (
+            isinstance(key, str)
+            and key != self.global_tenant
+            and key.endswith(self.tenant_pattern_suffix)
+        )
+
+    def get_tenant_patterns(self):
+        # Compile the patterns once per request, rather than on every check.
+        patterns = context.get_for_view(self, "tenant_patterns")
+        if patterns is None:
+            patterns = self.compile_tenant_patterns(self.get_role_data())
+            context.set_for_view(self, "tenant_patterns", patterns)
+
+        return patterns
+
+    def compile_tenant_patterns(self, role_data):
+        patterns = TenantPatternTrie()
+
+        for key, tenant_role in role_data.items():
+            if not self.is_tenant_pattern(key):
+                continue
+            if not isinstance(tenant_role, int):
+                continue
+
+            patterns.add(key[: -len(self.tenant_pattern_suffix)], tenant_role)
+
+        return patterns
+
     def get_tenant_role(self, tenant_id):
+        tenant_id = str(tenant_id)
+
         global_role = self.get_global_role()
+        pattern_role = self.get_tenant_patterns().get_role(
+            tenant_id, global_role
+        )
         try:
-            role = self.ensure_role(self.get_role_data()[str(tenant_id)])
+            role = self.ensure_role(self.get_role_data()[tenant_id])
         except KeyError:
-            return global_role
-        return max(role, global_role)
+            return pattern_role
+        return max(role, pattern_role)
 
     def get_authorized_tenant_ids(self, required_role):
         tenant_ids = []
 
         for tenant_id, tenant_role in self.get_role_data().items():
+            if self.is_tenant_pattern(tenant_id):
+                continue
+
             try:
                 tenant_id = self.tenant_id_type(tenant_id)
             except (TypeError, AttributeError, ValueError):
@@ -113,6 +234,9 @@ class TenantAuthorization(
         self.check_request_tenant_id()
 
     def check_request_tenant_id(self):
+        if self.get_policy().read_public:
+            return
+
         try:
             tenant_id = self.get_request_tenant_id()
         except KeyError:
@@ -122,16 +246,134 @@ class TenantAuthorization(
             flask.abort(404)
 
     def filter_query(self, query, view):
+        if self.get_policy().read_public:
+            return query
         if self.get_global_role() >= self.read_role:
             return query
 
         return query.filter(self.get_filter(view))
 
     def get_filter(self, view):
-        return self.get_model_tenant_id(view.model).in_(
+        column = self.get_model_tenant_id(view.model)
+        tenant_filter = column.in_(
             self.get_authorized_tenant_ids(self.read_role),
         )
 
+        prefixes = self.get_tenant_patterns().get_prefixes(self.read_role)
+        if not prefixes:
+            return tenant_filter
+
+        return sa.or_(
+            tenant_filter,
+            *(self.get_prefix_filter(column, prefix) for prefix in prefixes),
+        )
+
+    def get_prefix_filter(self, column, prefix):
+        # Compare the leading characters for equality, to match the trie. LIKE
+        # and ranges depend on the collation, and LIKE fails on UUID columns.
+        column = self.get_string_column(column)
+        return sa.func.substr(column, 1, len(prefix)) == prefix
+
+    def get_string_column(self, column):
+        # Patterns are matched against tenant ids as strings.
+        if isinstance(column.type, sa.String):
+            return column
+        return sa.cast(column, sa.String)
+
+    def stream_query(self, query, view):
+        """Get an iterator over the rows of `query` the user can read.
+
+        Rather than filtering on every authorized tenant at once, this runs
+        one `yield_per` query per chunk of at most `stream_chunk_size` tenant
+        ids and per tenant pattern. Any existing ordering on `query` is
+        replaced: rows are ordered by tenant id, then by primary key.
+
+        Chunks are run in tenant id string order. The order is deterministic,
+        but only matches the database's ordering across chunks under a binary
+        collation.
+
+        Authorization happens immediately, so the iterator can be consumed
+        outside of the request context.
+        """
+        primary_key = sa.inspect(view.model).primary_key
+        query = query.order_by(None)
+
+        if (
+            self.get_policy().read_public
+            or self.get_global_role() >= self.read_role
+        ):
+            return self.stream_chunks((query.order_by(*primary_key),))
+
+        # Order by the column itself so the database can use its index.
+        column = self.get_model_tenant_id(view.model)
+        query = query.order_by(column, *primary_key)
+
+        return self.stream_chunks(
+            [
+                query.filter(self.get_stream_chunk_filter(column, chunk))
+                for chunk in self.get_stream_chunks()
+            ]
+        )
+
+    def get_stream_chunks(self):
+        # Each chunk is either a tuple of tenant ids or a pattern prefix.
+        patterns = self.get_tenant_patterns()
+
+        # Tenants already covered by a pattern would otherwise be duplicated.
+        tenant_ids = (
+            tenant_id
+            for tenant_id in self.get_authorized_tenant_ids(self.read_role)
+            if patterns.get_role(str(tenant_id), PUBLIC) < self.read_role
+        )
+        prefixes = patterns.get_prefixes(self.read_role)
+
+        # Patterns never overlap the remaining tenant ids, so merging them in
+        # string order keeps the chunks in tenant id order.
+        entries = sorted(
+            (
+                *(
+                    (str(tenant_id), tenant_id, False)
+                    for tenant_id in tenant_ids
+                ),
+                *((prefix, prefix, True) for prefix in prefixes),
+            ),
+            key=itemgetter(0),
+        )
+
+        chunks = []
+        chunk = []
+
+        for _, tenant_id_or_prefix, is_prefix in entries:
+            if not is_prefix:
+                chunk.append(tenant_id_or_prefix)
+                if len(chunk) < self.stream_chunk_size:
+                    continue
+
+            if chunk:
+                chunks.append(tuple(chunk))
+                chunk = []
+
+            if is_prefix:
+                chunks.append(tenant_id_or_prefix)
+
+        if chunk:
+            chunks.append(tuple(chunk))
+
+        return chunks
+
+    def get_stream_chunk_filter(self, column, chunk):
+        if isinstance(chunk, str):
+            return self.get_prefix_filter(column, chunk)
+
+        return column.in_(chunk)
+
+    def stream_chunks(self, queries):
+        for query in queries:
+            yield from self.stream_chunk(query)
+
+    def stream_chunk(self, query):
+        return query.yield_per(self.stream_yield_per)
+
     def authorize_update_item(self, item, data):
         self.authorize_update_item_tenant_id(item, data)
         super().authorize_update_item(item, data)
@@ -146,11 +388,14 @@ class TenantAuthorization(
                 raise ApiError(403, {"code": "invalid_data.tenant"})
 
     def authorize_modify_item(self, item, action):
+        if self.get_policy().modify_not_allowed:
+            raise ApiError(403, {"code": "invalid_tenant.role"})
+
         required_role = self.get_required_role(action)
         self.authorize_item_tenant_role(item, required_role)
 
     def get_required_role(self, action):
-        return getattr(self, f"{action}_role")
+        return self.get_policy().get_required_role(action)
 
     def authorize_item_tenant_role(self, item, required_role):
         tenant_id = self.get_item_tenant_id(item)
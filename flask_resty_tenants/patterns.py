@@ -0,0 +1,62 @@
+_ROLE = None
+
+# -----------------------------------------------------------------------------
+
+
+class TenantPatternTrie:
+    """A prefix trie mapping tenant id prefixes to roles.
+
+    Matching a tenant id walks at most `len(tenant_id)` nodes, regardless of
+    how many patterns are stored.
+    """
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, prefix, role):
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+
+        current_role = node.get(_ROLE)
+        if current_role is not None:
+            role = max(role, current_role)
+        node[_ROLE] = role
+
+    def get_role(self, tenant_id, default):
+        role = default
+
+        node = self._root
+        for char in tenant_id:
+            role = max(role, node.get(_ROLE, role))
+            try:
+                node = node[char]
+            except KeyError:
+                return role
+
+        return max(role, node.get(_ROLE, role))
+
+    def get_prefixes(self, required_role):
+        """Get the shortest prefixes that grant at least `required_role`.
+
+        Prefixes nested under an already matching prefix are redundant, so
+        they are omitted.
+        """
+        prefixes = []
+
+        stack = [("", self._root)]
+        while stack:
+            prefix, node = stack.pop()
+
+            role = node.get(_ROLE)
+            if role is not None and role >= required_role:
+                prefixes.append(prefix)
+                continue
+
+            stack.extend(
+                (prefix + char, child)
+                for char, child in node.items()
+                if char is not _ROLE
+            )
+
+        return sorted(prefixes)
@@ -0,0 +1,259 @@
+import asyncio
+import threading
+import uuid
+
+import flask
+import pytest
+from flask_resty import Api, ApiError, AuthenticationBase, GenericModelView
+from flask_resty.authentication import set_request_credentials
+from flask_resty.testing import assert_response
+from marshmallow import Schema, fields
+from sqlalchemy import Column, Integer, String
+
+from flask_resty_tenants import MEMBER, AsyncTenantAuthorization
+
+# -----------------------------------------------------------------------------
+
+
+class RoleStore:
+    def __init__(self, role_data, delay=0):
+        self.role_data = role_data
+        self.delay = delay
+        self.num_lookups = 0
+
+    async def get_role_data(self, credentials):
+        self.num_lookups += 1
+        await asyncio.sleep(self.delay)
+        return self.role_data.get(credentials["sub"])
+
+
+class Item:
+    def __init__(self, tenant_id):
+        self.tenant_id = tenant_id
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+# -----------------------------------------------------------------------------
+
+
+@pytest.yield_fixture
+def context(app):
+    with app.test_request_context():
+        yield
+
+
+@pytest.fixture
+def tenant_id():
+    return uuid.uuid4()
+
+
+@pytest.fixture
+def store(tenant_id):
+    return RoleStore({"foo": {str(tenant_id): MEMBER}})
+
+
+@pytest.fixture
+def auth(context, store):
+    auth = AsyncTenantAuthorization()
+    auth.role_source = store
+    return auth
+
+
+# -----------------------------------------------------------------------------
+
+
+def test_resolve_role_data(auth, store, tenant_id):
+    set_request_credentials({"sub": "foo"})
+
+    with pytest.raises(RuntimeError):
+        auth.is_authorized(tenant_id, 0)
+
+    assert run(auth.get_tenant_role_async(tenant_id)) == MEMBER
+    assert auth.is_authorized(tenant_id, MEMBER)
+    assert tuple(auth.get_authorized_tenant_ids(0)) == (tenant_id,)
+
+    run(auth.resolve_role_data())
+    assert store.num_lookups == 1
+
+
+def test_unknown_credentials(auth, tenant_id):
+    set_request_credentials({"sub": "bar"})
+
+    assert run(auth.resolve_role_data()) == {}
+    assert not auth.is_authorized(tenant_id, 0)
+
+
+def test_coalesce_lookups(auth, store):
+    set_request_credentials({"sub": "foo"})
+
+    async def lookup_all():
+        return await asyncio.gather(*(auth.load_role_data() for _ in range(5)))
+
+    results = run(lookup_all())
+
+    assert store.num_lookups == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_coalesce_lookups_cancelled(auth, store):
+    set_request_credentials({"sub": "foo"})
+    store.delay = 0.01
+
+    async def lookup_cancelled():
+        first = asyncio.ensure_future(auth.load_role_data())
+        await asyncio.sleep(0)
+
+        second = asyncio.ensure_future(auth.load_role_data())
+        await asyncio.sleep(0)
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        return await second
+
+    assert run(lookup_cancelled()) == store.role_data["foo"]
+    assert store.num_lookups == 2
+
+
+def test_coalesce_lookups_across_loops(app, tenant_id):
+    store = RoleStore({"foo": {str(tenant_id): MEMBER}}, delay=0.1)
+    auth = AsyncTenantAuthorization()
+    auth.role_source = store
+
+    barrier = threading.Barrier(2)
+    results = []
+
+    def lookup():
+        with app.test_request_context():
+            set_request_credentials({"sub": "foo"})
+            barrier.wait()
+            results.append(run(auth.load_role_data()))
+
+    threads = [threading.Thread(target=lookup) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.num_lookups == 1
+    assert results == [{str(tenant_id): MEMBER}] * 2
+
+
+def test_authorize_modify_items(auth, tenant_id):
+    set_request_credentials({"sub": "foo"})
+
+    run(auth.authorize_modify_items_async((Item(tenant_id),), "update"))
+
+    with pytest.raises(ApiError):
+        run(
+            auth.authorize_modify_items_async(
+                (Item(tenant_id), Item(uuid.uuid4())), "update"
+            )
+        )
+
+
+# -----------------------------------------------------------------------------
+
+requires_async_views = pytest.mark.skipif(
+    not hasattr(flask.Flask, "ensure_sync"),
+    reason="async views require Flask 2",
+)
+
+
+@pytest.yield_fixture
+def views(app, db):
+    class Widget(db.Model):
+        __tablename__ = "widgets"
+
+        id = Column(Integer, primary_key=True)
+        tenant_id = Column(String)
+        name = Column(String)
+
+    class WidgetSchema(Schema):
+        id = fields.Integer(as_string=True)
+        name = fields.String()
+        tenant_id = fields.String()
+
+    # dummy authentication based on query params
+    class Authentication(AuthenticationBase):
+        def get_request_credentials(self):
+            return {"sub": flask.request.args.get("sub")}
+
+    class Authorization(AsyncTenantAuthorization):
+        role_source = RoleStore(
+            {"foo": {"tenant_1": 0}, "bar": {"tenant_2": 0}}
+        )
+        tenant_id_type = str
+
+    class WidgetViewBase(GenericModelView):
+        model = Widget
+        schema = WidgetSchema()
+
+        authentication = Authentication()
+        authorization = Authorization()
+
+    class WidgetListView(WidgetViewBase):
+        async def get(self):
+            await self.authorization.authorize_request_async()
+            return self.list()
+
+    class TenantWidgetListView(WidgetViewBase):
+        async def get(self, tenant_id):
+            return self.list()
+
+    class SyncWidgetListView(WidgetViewBase):
+        def get(self):
+            return self.list()
+
+    api = Api(app)
+    api.add_resource("/widgets", WidgetListView)
+    api.add_resource("/tenants/<tenant_id>/widgets", TenantWidgetListView)
+    api.add_resource("/sync_widgets", SyncWidgetListView)
+
+    db.create_all()
+    db.session.add_all(
+        (
+            Widget(tenant_id="tenant_1", name="Foo"),
+            Widget(tenant_id="tenant_2", name="Bar"),
+        )
+    )
+    db.session.commit()
+
+    yield
+
+    db.drop_all()
+
+
+@requires_async_views
+@pytest.mark.parametrize(
+    "sub, result", (("foo", [{"name": "Foo"}]), ("bar", [{"name": "Bar"}]))
+)
+def test_view_list(views, client, sub, result):
+    response = client.get("/widgets", query_string={"sub": sub})
+    assert_response(response, 200, result)
+
+
+@requires_async_views
+@pytest.mark.parametrize("sub, result", (("foo", 200), ("bar", 404)))
+def test_view_tenant_list(views, client, sub, result):
+    response = client.get(
+        "/tenants/tenant_1/widgets", query_string={"sub": sub}
+    )
+    assert_response(response, result)
+
+
+@requires_async_views
+@pytest.mark.parametrize(
+    "sub, result", (("foo", [{"name": "Foo"}]), ("bar", [{"name": "Bar"}]))
+)
+def test_view_sync_list(views, client, sub, result):
+    response = client.get("/sync_widgets", query_string={"sub": sub})
+    assert_response(response, 200, result)
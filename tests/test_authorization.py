@@ -1,10 +1,18 @@
 import uuid
 
 import pytest
+from flask_resty import ApiError
 from flask_resty.authentication import set_request_credentials
-from sqlalchemy import Column, Integer
+from sqlalchemy import Column, Integer, String
 
-from flask_resty_tenants import TenantAuthorization
+from flask_resty_tenants import (
+    ADMIN,
+    MEMBER,
+    NOT_ALLOWED,
+    PUBLIC,
+    READ_ONLY,
+    TenantAuthorization,
+)
 
 # -----------------------------------------------------------------------------
 
@@ -146,3 +154,193 @@ def test_filtering(db, auth, tenant_id):
     assert not auth.is_authorized(tenant_id, 1)
 
     db.drop_all()
+
+
+def test_policy(auth):
+    auth.delete_role = ADMIN
+
+    policy = auth.get_policy()
+
+    assert policy is auth.get_policy()
+    assert policy.as_dict() == {
+        "roles": {
+            "read": READ_ONLY,
+            "save": MEMBER,
+            "create": MEMBER,
+            "update": MEMBER,
+            "delete": ADMIN,
+        },
+        "read_public": False,
+        "modify_not_allowed": False,
+    }
+    assert auth.get_required_role("delete") == ADMIN
+
+    with pytest.raises(TypeError):
+        policy.roles["delete"] = MEMBER
+
+
+def test_policy_set_role(auth):
+    assert auth.get_required_role("delete") == MEMBER
+
+    auth.delete_role = ADMIN
+    assert auth.get_required_role("delete") == ADMIN
+
+    del auth.delete_role
+    auth.modify_role = READ_ONLY
+    assert auth.get_required_role("delete") == READ_ONLY
+
+
+def test_policy_flags():
+    class Authorization(TenantAuthorization):
+        read_role = PUBLIC
+        modify_role = NOT_ALLOWED
+
+    policy = Authorization().get_policy()
+
+    assert policy.read_public
+    assert policy.modify_not_allowed
+
+
+def test_policy_modify_not_allowed():
+    set_request_credentials({"app_metadata": {"*": ADMIN}})
+
+    class Authorization(TenantAuthorization):
+        modify_role = NOT_ALLOWED
+
+    class Item:
+        pass
+
+    # The item's tenant id is never looked up.
+    with pytest.raises(ApiError):
+        Authorization().authorize_modify_item(Item(), "save")
+
+
+def test_tenant_patterns(auth):
+    set_request_credentials(
+        {
+            "app_metadata": {
+                "region-eu/*": READ_ONLY,
+                "region-eu/fr/*": MEMBER,
+                "region-eu/fr/paris": ADMIN,
+                "region-us/*": None,
+                "*": PUBLIC,
+            }
+        }
+    )
+
+    auth.tenant_id_type = str
+
+    assert auth.get_tenant_role("region-eu/de/berlin") == READ_ONLY
+    assert auth.get_tenant_role("region-eu/fr/lyon") == MEMBER
+    assert auth.get_tenant_role("region-eu/fr/paris") == ADMIN
+    assert auth.get_tenant_role("region-us/boston") == PUBLIC
+    assert auth.get_tenant_role("region-eu") == PUBLIC
+    assert auth.get_tenant_patterns() is auth.get_tenant_patterns()
+    assert auth.get_tenant_patterns().get_prefixes(READ_ONLY) == ["region-eu/"]
+    assert auth.get_tenant_patterns().get_prefixes(MEMBER) == ["region-eu/fr/"]
+    assert tuple(auth.get_authorized_tenant_ids(READ_ONLY)) == (
+        "region-eu/fr/paris",
+    )
+
+
+def test_tenant_pattern_filter(db, auth):
+    set_request_credentials({"app_metadata": {"1*": 0}})
+
+    class Widget(db.Model):
+        __tablename__ = "widgets"
+
+        id = Column(Integer, primary_key=True)
+        tenant_id = Column(Integer)
+
+    class View:
+        model = Widget
+
+    db.create_all()
+    db.session.add_all(Widget(tenant_id=tenant_id) for tenant_id in (1, 12, 2))
+
+    assert sorted(
+        widget.tenant_id for widget in auth.filter_query(Widget.query, View)
+    ) == [1, 12]
+
+    db.drop_all()
+
+
+def test_tenant_pattern_filter_collation(db, auth):
+    set_request_credentials({"app_metadata": {"tenant_1*": 0}})
+
+    # Like many locale collations, ignore punctuation when comparing.
+    def collate_without_punctuation(a, b):
+        a = "".join(char for char in a if char.isalnum())
+        b = "".join(char for char in b if char.isalnum())
+        return (a > b) - (a < b)
+
+    connection = db.engine.raw_connection()
+    connection.connection.create_collation(
+        "nopunct", collate_without_punctuation
+    )
+    connection.close()
+
+    class Widget(db.Model):
+        __tablename__ = "widgets"
+
+        id = Column(Integer, primary_key=True)
+        tenant_id = Column(String(collation="nopunct"))
+
+    class View:
+        model = Widget
+
+    db.create_all()
+    db.session.add_all(
+        Widget(tenant_id=tenant_id)
+        for tenant_id in ("tenant_1a", "tenant10", "tenant_2")
+    )
+
+    # "tenant10" sorts between "tenant_1" and "tenant_2" here, but doesn't
+    # have the prefix.
+    assert [
+        widget.tenant_id for widget in auth.filter_query(Widget.query, View)
+    ] == ["tenant_1a"]
+    assert auth.get_tenant_role("tenant10") == PUBLIC
+
+    db.drop_all()
+
+
+def test_tenant_patterns_missing_claim(auth):
+    set_request_credentials({})
+
+    assert auth.get_tenant_patterns() is auth.get_tenant_patterns()
+
+
+def test_stream_chunks(auth):
+    set_request_credentials(
+        {
+            "app_metadata": {
+                "a1": 0,
+                "a2": 0,
+                "a3*": 0,
+                "a3x": 0,
+                "a4": 0,
+                "a5": 0,
+                "a6": 0,
+                "b*": -1,
+            }
+        }
+    )
+
+    auth.tenant_id_type = str
+    auth.stream_chunk_size = 2
+
+    assert auth.get_stream_chunks() == [
+        ("a1", "a2"),
+        "a3",
+        ("a4", "a5"),
+        ("a6",),
+    ]
+
+
+def test_stream_chunks_split_by_pattern(auth):
+    set_request_credentials({"app_metadata": {"a1": 0, "a2*": 0, "a3": 0}})
+
+    auth.tenant_id_type = str
+
+    assert auth.get_stream_chunks() == [("a1",), "a2", ("a3",)]
@@ -3,6 +3,7 @@ import json
 import flask
 import pytest
 from flask_resty import Api, AuthenticationBase, GenericModelView
+from flask_resty.authentication import set_request_credentials
 from flask_resty.testing import assert_response
 from marshmallow import Schema, fields
 from sqlalchemy import Column, Integer, String
@@ -166,11 +167,63 @@ def request(client, method, path, data, **kwargs):
 # -----------------------------------------------------------------------------
 
 
+@pytest.fixture
+def stream(app, models, auth):
+    class View:
+        model = models["widget"]
+
+    authorization = auth["authorization"]
+    authorization.stream_chunk_size = 1
+
+    chunk_queries = []
+
+    def stream_chunk(query):
+        chunk_query = TenantAuthorization.stream_chunk(authorization, query)
+        chunk_queries.append(chunk_query)
+        return chunk_query
+
+    authorization.stream_chunk = stream_chunk
+
+    def stream(credentials):
+        with app.test_request_context(query_string=credentials):
+            set_request_credentials(
+                auth["authentication"].get_request_credentials()
+            )
+
+            widgets = authorization.stream_query(
+                models["widget"].query.order_by(models["widget"].name), View,
+            )
+
+        # Consume the rows outside of the request context, as a streamed
+        # response would.
+        return [widget.name for widget in widgets]
+
+    stream.chunk_queries = chunk_queries
+    return stream
+
+
+# -----------------------------------------------------------------------------
+
+
 def test_list(client):
     response = client.get("/widgets", query_string=USER_CREDENTIALS)
     assert_response(response, 200, [{"name": "Foo"}, {"name": "Bar"},])
 
 
+@pytest.mark.parametrize(
+    "credentials, result",
+    (
+        ({"tenant_*": 0}, [{"name": "Foo"}, {"name": "Bar"}, {"name": "Baz"}]),
+        ({"tenant_1*": 0, TENANT_ID_3: 0}, [{"name": "Foo"}, {"name": "Baz"}]),
+        ({"tenant*": -1, "tenant_2*": 0}, [{"name": "Bar"}]),
+        ({"TENANT_*": 0}, []),
+    ),
+)
+def test_list_tenant_patterns(client, credentials, result):
+    response = client.get("/widgets", query_string=credentials)
+    assert_response(response, 200, result)
+
+
 @pytest.mark.parametrize(
     "tenant_id, result",
     ((TENANT_ID_1, 200), (TENANT_ID_2, 200), (TENANT_ID_3, 404),),
@@ -330,3 +383,31 @@ def test_delete(client, credentials, result):
 def test_admin_delete(client, credentials, result):
     response = client.delete("/admin_widgets/2", query_string=credentials)
     assert_response(response, result)
+
+
+@pytest.mark.parametrize(
+    "credentials, result",
+    (
+        (DEFAULT_READ_CREDENTIALS, ["Foo", "Bar", "Baz"]),
+        ({TENANT_ID_3: 0, TENANT_ID_2: 0, TENANT_ID_1: -1}, ["Bar", "Baz"]),
+        ({"tenant_*": 0, TENANT_ID_1: 0}, ["Foo", "Bar", "Baz"]),
+        ({"tenant_3*": 0, TENANT_ID_1: 0}, ["Foo", "Baz"]),
+        (
+            {"tenant_1*": 0, TENANT_ID_3: 0, TENANT_ID_2: 0},
+            ["Foo", "Bar", "Baz"],
+        ),
+        (None, []),
+    ),
+)
+def test_stream(stream, credentials, result):
+    assert stream(credentials) == result
+
+
+def test_stream_chunk_queries(stream, auth):
+    auth["authorization"].stream_chunk_size = 2
+
+    stream({TENANT_ID_1: 0, TENANT_ID_2: 0, TENANT_ID_3: 0})
+
+    assert len(stream.chunk_queries) == 2
+    for query in stream.chunk_queries:
+        assert query.get_execution_options()["max_row_buffer"] == 1000